@@ -1,32 +1,63 @@
 """
-Flask API service for extract-text module
+FastAPI service for extract-text module
 Provides endpoints for tele-bot module to send user input and receive extracted metadata
 """
 
-from flask import Flask, request, jsonify
-from typing import Dict, Any
-from extractor import extract_text, MusicMetadata
+import asyncio
+import hashlib
 
-app = Flask(__name__)
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from typing import List
 
+from extractor import extract_text, extract_text_batch, MusicMetadata
 
-@app.route('/health', methods=['GET'])
-def health_check():
+app = FastAPI(title="extract-text")
+
+# Upper bound on concurrent LLM calls, to stay within the model provider quota
+MAX_CONCURRENT_EXTRACTIONS = 16
+# Seconds clients and proxies may reuse a /extract response
+CACHE_MAX_AGE = 3600
+_extraction_semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+
+
+async def extract_text_async(text: str) -> MusicMetadata:
+    """Run the blocking extraction in a worker thread so the event loop stays free"""
+    async with _extraction_semaphore:
+        return await asyncio.to_thread(extract_text, text)
+
+
+async def extract_text_batch_async(texts: List[str]) -> List[dict]:
+    """Run one blocking batch extraction in a worker thread, as compact dictionaries"""
+    async with _extraction_semaphore:
+        return await asyncio.to_thread(extract_text_batch, texts, True)
+
+
+async def _get_json(request: Request):
+    """Parse the request body, returning None for missing or malformed JSON"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+@app.get('/health')
+async def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "ok", "service": "extract-text"}), 200
+    return JSONResponse({"status": "ok", "service": "extract-text"}, status_code=200)
 
 
-@app.route('/extract', methods=['POST'])
-def extract_endpoint():
+@app.post('/extract')
+async def extract_endpoint(request: Request):
     """
     Extract music metadata from user input text
-    
+
     Expected JSON:
     {
         "text": "user input text",
         "user_id": "optional user identifier"
     }
-    
+
     Returns:
     {
         "success": true/false,
@@ -39,47 +70,57 @@ def extract_endpoint():
     }
     """
     try:
-        data = request.get_json()
-        
+        data = await _get_json(request)
+
         if not data or 'text' not in data:
-            return jsonify({
+            return JSONResponse({
                 "success": False,
                 "message": "Missing 'text' field in request"
-            }), 400
-        
+            }, status_code=400)
+
         user_input = data.get('text', '').strip()
         user_id = data.get('user_id')
-        
+
         if not user_input:
-            return jsonify({
+            return JSONResponse({
                 "success": False,
                 "message": "Empty text provided"
-            }), 400
-        
+            }, status_code=400)
+
+        # The response is fully determined by text and user_id, so the tag can be
+        # checked before paying for the extraction
+        etag = '"' + hashlib.sha1(f"{user_input}\0{user_id}".encode()).hexdigest() + '"'
+        cache_headers = {"ETag": etag, "Cache-Control": f"max-age={CACHE_MAX_AGE}"}
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers=cache_headers)
+
         # Extract metadata
-        metadata = extract_text(user_input)
-        
+        metadata = await extract_text_async(user_input)
+
         # Convert to dictionary with only non-None fields
-        result = {k: v for k, v in metadata.dict().items() if v is not None}
-        
-        return jsonify({
+        result = metadata.to_dict(compact=True)
+        if not result:
+            # Failed extractions also come back empty, a retry may well succeed
+            cache_headers = {"Cache-Control": "no-store"}
+
+        return JSONResponse({
             "success": True,
             "data": result,
             "user_id": user_id
-        }), 200
-        
+        }, status_code=200, headers=cache_headers)
+
     except Exception as e:
-        return jsonify({
+        return JSONResponse({
             "success": False,
             "message": f"Extraction failed: {str(e)}"
-        }), 500
+        }, status_code=500)
 
 
-@app.route('/extract/batch', methods=['POST'])
-def extract_batch_endpoint():
+@app.post('/extract/batch')
+async def extract_batch_endpoint(request: Request):
     """
     Extract metadata from multiple texts
-    
+
     Expected JSON:
     {
         "texts": [
@@ -87,69 +128,66 @@ def extract_batch_endpoint():
             ...
         ]
     }
-    
+
     Returns array of extraction results
     """
     try:
-        data = request.get_json()
-        
+        data = await _get_json(request)
+
         if not data or 'texts' not in data:
-            return jsonify({
+            return JSONResponse({
                 "success": False,
                 "message": "Missing 'texts' field in request"
-            }), 400
-        
+            }, status_code=400)
+
         texts = data.get('texts', [])
-        
+
         if not isinstance(texts, list):
-            return jsonify({
+            return JSONResponse({
                 "success": False,
                 "message": "'texts' must be an array"
-            }), 400
-        
-        results = []
-        for item in texts:
-            user_input = item.get('text', '').strip()
-            user_id = item.get('user_id')
-            
-            if user_input:
-                metadata = extract_text(user_input)
-                result = {k: v for k, v in metadata.dict().items() if v is not None}
-            else:
-                result = {}
-            
-            results.append({
-                "user_id": user_id,
-                "data": result
-            })
-        
-        return jsonify({
+            }, status_code=400)
+
+        items = [(item.get('text', '').strip(), item.get('user_id')) for item in texts]
+
+        # extract_text_batch skips empty texts, shares results between duplicates
+        # and runs one model call per chunk of distinct texts concurrently
+        extracted = await extract_text_batch_async([user_input for user_input, _ in items])
+
+        results = [
+            {"user_id": user_id, "data": data}
+            for (_, user_id), data in zip(items, extracted)
+        ]
+
+        return JSONResponse({
             "success": True,
             "results": results
-        }), 200
-        
+        }, status_code=200)
+
     except Exception as e:
-        return jsonify({
+        return JSONResponse({
             "success": False,
             "message": f"Batch extraction failed: {str(e)}"
-        }), 500
+        }, status_code=500)
 
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
+@app.exception_handler(404)
+async def not_found(request: Request, error):
+    return JSONResponse({
         "success": False,
         "message": "Endpoint not found"
-    }), 404
+    }, status_code=404)
 
 
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({
+@app.exception_handler(500)
+async def internal_error(request: Request, error):
+    return JSONResponse({
         "success": False,
         "message": "Internal server error"
-    }), 500
+    }, status_code=500)
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=5001)
@@ -2,42 +2,55 @@
 Client library for tele-bot module to communicate with extract-text service
 """
 
+import asyncio
+import logging
+import threading
+
+import aiohttp
+import ijson
 import requests
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from typing import ClassVar, Dict, Any, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, fields
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackInfo:
     """Track information"""
     name: Optional[str] = None
     genre: Optional[str] = None
     mood: Optional[str] = None
     year: Optional[int] = None
-    era: Optional[str] = None
+    
+    _FIELDS: ClassVar[Tuple[str, ...]]
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary with non-None values"""
-        return {k: v for k, v in self.__dict__.items() if v is not None}
+        return {n: v for n in self._FIELDS if (v := getattr(self, n)) is not None}
 
 
-@dataclass
+@dataclass(slots=True)
 class ArtistInfo:
     """Artist information"""
     name: Optional[str] = None
-    country: Optional[str] = None
+    language: Optional[str] = None
+    
+    _FIELDS: ClassVar[Tuple[str, ...]]
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary with non-None values"""
-        return {k: v for k, v in self.__dict__.items() if v is not None}
+        return {n: v for n in self._FIELDS if (v := getattr(self, n)) is not None}
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedMetadata:
     """Extracted music metadata"""
     track: Optional[TrackInfo] = None
     artist: Optional[ArtistInfo] = None
-    language: Optional[str] = None
     limit: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
@@ -47,13 +60,38 @@ class ExtractedMetadata:
             result['track'] = self.track.to_dict()
         if self.artist:
             result['artist'] = self.artist.to_dict()
-        if self.language:
-            result['language'] = self.language
         if self.limit:
             result['limit'] = self.limit
         return result
 
 
+# Field names are resolved once instead of walking an instance __dict__ per call
+for _info_cls in (TrackInfo, ArtistInfo):
+    _info_cls._FIELDS = tuple(f.name for f in fields(_info_cls))
+
+
+def _parse_metadata(data: Dict[str, Any]) -> ExtractedMetadata:
+    """Build ExtractedMetadata from the 'data' field of an extract response"""
+    # Parse nested structures
+    track_data = data.get('track')
+    artist_data = data.get('artist')
+
+    # Fields the service adds later are ignored instead of failing the whole parse
+    track = TrackInfo(*map(track_data.get, TrackInfo._FIELDS)) if track_data else None
+    artist = ArtistInfo(*map(artist_data.get, ArtistInfo._FIELDS)) if artist_data else None
+
+    return ExtractedMetadata(
+        track=track,
+        artist=artist,
+        limit=data.get('limit')
+    )
+
+
+def _copy_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a cached 'data' dict, including its nested objects, for a caller to own"""
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in data.items()}
+
+
 class ExtractTextClient:
     """Client for extract-text service"""
     
@@ -66,11 +104,26 @@ class ExtractTextClient:
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = 10
+
+        # Reuse pooled keep-alive connections instead of a new handshake per call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+        # Recently extracted texts, so repeated messages skip the network round-trip
+        self._cache: TTLCache = TTLCache(maxsize=10000, ttl=3600)
+        self._cache_lock = threading.Lock()
     
     def health_check(self) -> bool:
         """Check if service is healthy"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/health",
                 timeout=self.timeout
             )
@@ -78,6 +131,58 @@ class ExtractTextClient:
         except requests.RequestException:
             return False
     
+    def extract_raw(
+        self,
+        text: str,
+        user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Extract metadata from user text as the service's JSON dictionary
+        
+        Args:
+            text: User input text
+            user_id: Optional user identifier
+            
+        Returns:
+            Dictionary of extracted fields or None if extraction fails
+        """
+        key = (self.base_url, text)
+        with self._cache_lock:
+            data = self._cache.get(key)
+        
+        try:
+            if data is None:
+                payload = {
+                    "text": text,
+                    "user_id": user_id
+                }
+                
+                response = self.session.post(
+                    f"{self.base_url}/extract",
+                    json=payload,
+                    timeout=self.timeout
+                )
+                
+                body = response.json()
+                if response.status_code != 200:
+                    logger.warning("Extraction failed: %s", body.get('message'))
+                    return None
+                
+                data = body.get('data', {})
+                if data:
+                    # Empty data may be a failed extraction, ask again next time
+                    with self._cache_lock:
+                        self._cache[key] = data
+            
+            return _copy_data(data)
+            
+        except requests.RequestException as e:
+            logger.warning("Request error: %s", e)
+            return None
+        except Exception as e:
+            logger.warning("Error: %s", e)
+            return None
+    
     def extract(
         self,
         text: str,
@@ -93,83 +198,220 @@ class ExtractTextClient:
         Returns:
             ExtractedMetadata object or None if extraction fails
         """
+        data = self.extract_raw(text, user_id)
+        if data is None:
+            return None
+        try:
+            return _parse_metadata(data)
+        except Exception as e:
+            logger.warning("Error: %s", e)
+            return None
+    
+    def extract_batch(
+        self,
+        texts: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract metadata from multiple texts
+        
+        Args:
+            texts: List of dicts with 'text' and optional 'user_id'
+            
+        Returns:
+            List of extraction results, empty if the request or parsing fails
+        """
+        try:
+            # A response cut off mid-stream must not pass for a shorter batch
+            return list(self.iter_extract_batch(texts))
+        except requests.RequestException as e:
+            logger.warning("Request error: %s", e)
+            return []
+        except Exception as e:
+            logger.warning("Error: %s", e)
+            return []
+    
+    def iter_extract_batch(
+        self,
+        texts: List[Dict[str, str]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Extract metadata from multiple texts, parsing the response incrementally
+        
+        Args:
+            texts: List of dicts with 'text' and optional 'user_id'
+            
+        Yields:
+            Extraction results in request order
+
+        Raises:
+            requests.RequestException or ijson.JSONError when the request fails or the
+            response breaks off, possibly after some results were already yielded
+        """
+        payload = {"texts": texts}
+        
+        with self.session.post(
+            f"{self.base_url}/extract/batch",
+            json=payload,
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                logger.warning("Batch extraction failed: %s", response.json().get('message'))
+                return
+            
+            response.raw.decode_content = True
+            yield from ijson.items(response.raw, 'results.item', use_float=True)
+
+
+class AsyncExtractTextClient:
+    """Asyncio client for extract-text service"""
+
+    def __init__(self, base_url: str = "http://localhost:5001"):
+        """
+        Initialize client
+
+        Args:
+            base_url: Base URL of extract-text service
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=10)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session lazily, inside the running event loop"""
+        loop = asyncio.get_running_loop()
+        # A session is bound to the loop it was created in; callers that use
+        # asyncio.run() once per call get a new loop each time
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                # Its loop is gone, so it cannot be awaited closed; let go of the connector
+                self._session.detach()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100),
+                timeout=self.timeout
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Close the underlying session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+    async def health_check(self) -> bool:
+        """Check if service is healthy"""
+        try:
+            async with self._get_session().get(f"{self.base_url}/health") as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def extract_raw(
+        self,
+        text: str,
+        user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Extract metadata from user text as the service's JSON dictionary
+
+        Args:
+            text: User input text
+            user_id: Optional user identifier
+
+        Returns:
+            Dictionary of extracted fields or None if extraction fails
+        """
         try:
             payload = {
                 "text": text,
                 "user_id": user_id
             }
-            
-            response = requests.post(
+
+            async with self._get_session().post(
                 f"{self.base_url}/extract",
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            if response.status_code != 200:
-                print(f"Extraction failed: {response.json().get('message')}")
+                json=payload
+            ) as response:
+                body = await response.json()
+
+            if response.status != 200:
+                logger.warning("Extraction failed: %s", body.get('message'))
                 return None
-            
-            data = response.json().get('data', {})
-            
-            # Parse nested structures
-            track_data = data.get('track')
-            artist_data = data.get('artist')
-            
-            track = TrackInfo(**track_data) if track_data else None
-            artist = ArtistInfo(**artist_data) if artist_data else None
-            
-            return ExtractedMetadata(
-                track=track,
-                artist=artist,
-                language=data.get('language'),
-                limit=data.get('limit')
-            )
-            
-        except requests.RequestException as e:
-            print(f"Request error: {str(e)}")
+
+            return body.get('data', {})
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Request error: %s", e)
             return None
         except Exception as e:
-            print(f"Error: {str(e)}")
+            logger.warning("Error: %s", e)
             return None
-    
-    def extract_batch(
+
+    async def extract(
+        self,
+        text: str,
+        user_id: Optional[str] = None
+    ) -> Optional[ExtractedMetadata]:
+        """
+        Extract metadata from user text
+
+        Args:
+            text: User input text
+            user_id: Optional user identifier
+
+        Returns:
+            ExtractedMetadata object or None if extraction fails
+        """
+        data = await self.extract_raw(text, user_id)
+        if data is None:
+            return None
+        try:
+            return _parse_metadata(data)
+        except Exception as e:
+            logger.warning("Error: %s", e)
+            return None
+
+    async def extract_batch(
         self,
         texts: List[Dict[str, str]]
     ) -> List[Dict[str, Any]]:
         """
         Extract metadata from multiple texts
-        
+
         Args:
             texts: List of dicts with 'text' and optional 'user_id'
-            
+
         Returns:
             List of extraction results
         """
         try:
             payload = {"texts": texts}
-            
-            response = requests.post(
+
+            async with self._get_session().post(
                 f"{self.base_url}/extract/batch",
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            if response.status_code != 200:
-                print(f"Batch extraction failed: {response.json().get('message')}")
+                json=payload
+            ) as response:
+                body = await response.json()
+
+            if response.status != 200:
+                logger.warning("Batch extraction failed: %s", body.get('message'))
                 return []
-            
-            return response.json().get('results', [])
-            
-        except requests.RequestException as e:
-            print(f"Request error: {str(e)}")
+
+            return body.get('results', [])
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Request error: %s", e)
             return []
         except Exception as e:
-            print(f"Error: {str(e)}")
+            logger.warning("Error: %s", e)
             return []
 
 
-# Global client instance
+# Global client instances
 _client = None
+_async_client = None
 
 
 def get_client(base_url: str = "http://localhost:5001") -> ExtractTextClient:
@@ -182,17 +424,51 @@ def get_client(base_url: str = "http://localhost:5001") -> ExtractTextClient:
 
 def extract_from_user_input(
     text: str,
-    user_id: Optional[str] = None
-) -> Optional[ExtractedMetadata]:
+    user_id: Optional[str] = None,
+    as_dict: bool = True
+) -> Union[Dict[str, Any], ExtractedMetadata, None]:
     """
     Convenience function for tele-bot module
     
     Args:
         text: User input text
         user_id: Optional user identifier
+        as_dict: Return the plain dictionary instead of building ExtractedMetadata
         
     Returns:
-        ExtractedMetadata or None
+        Dictionary or ExtractedMetadata, None if extraction fails
     """
     client = get_client()
+    if as_dict:
+        return client.extract_raw(text, user_id)
     return client.extract(text, user_id)
+
+
+def get_async_client(base_url: str = "http://localhost:5001") -> AsyncExtractTextClient:
+    """Get or create global async client instance"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncExtractTextClient(base_url)
+    return _async_client
+
+
+async def extract_from_user_input_async(
+    text: str,
+    user_id: Optional[str] = None,
+    as_dict: bool = True
+) -> Union[Dict[str, Any], ExtractedMetadata, None]:
+    """
+    Async convenience function for tele-bot module
+
+    Args:
+        text: User input text
+        user_id: Optional user identifier
+        as_dict: Return the plain dictionary instead of building ExtractedMetadata
+
+    Returns:
+        Dictionary or ExtractedMetadata, None if extraction fails
+    """
+    client = get_async_client()
+    if as_dict:
+        return await client.extract_raw(text, user_id)
+    return await client.extract(text, user_id)
@@ -0,0 +1,810 @@
+import copy
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import textwrap
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime
+from logging import DEBUG, getLogger
+from types import MappingProxyType
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import requests
+
+logger = getLogger(__name__)
+logger.setLevel("INFO")
+
+# Define nested schema classes
+class _Record:
+    """Flat record of optional fields, converted from and to plain dictionaries"""
+
+    __slots__ = ()
+    _FIELDS: ClassVar[Tuple[str, ...]]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build from already normalized fields, ignoring unknown keys"""
+        return cls(*map(data.get, cls._FIELDS))
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        if compact:
+            return {n: v for n in self._FIELDS if (v := getattr(self, n)) is not None}
+        return {n: getattr(self, n) for n in self._FIELDS}
+
+
+@dataclass(slots=True, frozen=True)
+class TrackMetadata(_Record):
+    """Track information"""
+
+    name: Optional[str] = None  # Song/track name
+    genre: Optional[str] = None  # Music genre, one of VALID_GENRES when recognized
+    mood: Optional[str] = None  # Mood or emotion of the music
+    year: Optional[int] = None  # Specific year mentioned
+
+
+@dataclass(slots=True, frozen=True)
+class ArtistMetadata(_Record):
+    """Artist information"""
+
+    name: Optional[str] = None  # Artist/musician name
+    language: Optional[str] = None  # Artist language/origin
+
+
+# Field names are resolved once instead of per converted record
+for _record_cls in (TrackMetadata, ArtistMetadata):
+    _record_cls._FIELDS = tuple(f.name for f in fields(_record_cls))
+
+
+@dataclass(slots=True, frozen=True)
+class MusicMetadata:
+    """Extracted music metadata from user input"""
+
+    track: Optional[TrackMetadata] = None
+    artist: Optional[ArtistMetadata] = None
+    limit: Optional[int] = None  # Limit or quantity mentioned
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MusicMetadata":
+        """Build from the output of _normalize, values are not validated again"""
+        track = data.get("track")
+        artist = data.get("artist")
+        return cls(
+            TrackMetadata.from_dict(track) if track else None,
+            ArtistMetadata.from_dict(artist) if artist else None,
+            data.get("limit"),
+        )
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """Convert to a JSON-ready dictionary, dropping None values and empty records when compact"""
+        track = self.track.to_dict(compact) if self.track is not None else None
+        artist = self.artist.to_dict(compact) if self.artist is not None else None
+        if not compact:
+            return {"track": track, "artist": artist, "limit": self.limit}
+        result: Dict[str, Any] = {}
+        if track:
+            result["track"] = track
+        if artist:
+            result["artist"] = artist
+        if self.limit is not None:
+            result["limit"] = self.limit
+        return result
+
+
+PROMPT = textwrap.dedent(
+    """
+    Extract music-related information from the user input text.
+    Only include fields that are explicitly mentioned or can be clearly inferred.
+    Return the extracted data in the specified format.
+    
+    Text to analyze: {text}
+    
+    Extract the following if present:
+    
+    Schema: {schema}
+    
+    If {compact}, return the extracted data with all fields, including None values.
+    """
+)
+
+BATCH_PROMPT = textwrap.dedent(
+    """
+    Extract music-related information from each numbered user input text below.
+    Only include fields that are explicitly mentioned or can be clearly inferred.
+    Return exactly one result per text, in the same order as the texts.
+    
+    Texts to analyze:
+    {texts}
+    
+    Extract the following for each text if present:
+    
+    Schema: {schema}
+    """
+)
+
+VALID_GENRES = [
+    "Ballad",
+    "Pop",
+    "Rock",
+    "Edm",
+    "Hip-Hop",
+    "R&B",
+    "Jazz",
+    "Classical",
+    "Acoustic",
+    "Lo-Fi",
+    "Indie",
+    "Metal",
+]
+
+VALID_MOODS = [
+    "Happy",
+    "Sad",
+    "Energetic",
+    "Calm",
+    "Angry",
+    "Melancholic",
+    "Peaceful",
+    "Romantic",
+    "Unknown",
+]
+
+VALID_LANGUAGES = [
+    "English",
+    "Spanish",
+    "French",
+    "Japanese",
+    "Korean",
+    "Chinese",
+    "Vietnamese",
+    "Thai",
+    "Hindi",
+    "Unknown",
+]
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "track": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "genre": {"type": "string", "enum": VALID_GENRES},
+                "mood": {"type": "string", "enum": VALID_MOODS},
+                "year": {"type": "integer"},
+            },
+        },
+        "artist": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "language": {"type": "string", "enum": VALID_LANGUAGES},
+            },
+        },
+        "limit": {"type": "integer"},
+    },
+}
+
+DEFAULT_MODEL_NAME = "Qwen/Qwen3-4B"
+MIN_YEAR = 1900
+# Seconds the cached current year is trusted, so a long-running service still crosses New Year
+YEAR_TTL = 86400
+# [year, monotonic time it was read]
+_YEAR_CACHE = [datetime.now().year, time.monotonic()]
+MAX_LIMIT = 10
+# Jsonformer stops generating arrays after 10 items by default
+MAX_BATCH_SIZE = 10
+# Batched model calls in flight per process, one per chunk of MAX_BATCH_SIZE texts
+MAX_CONCURRENT_CHUNKS = 4
+
+# Common spellings the model produces for the canonical genres
+GENRE_ALIASES = {
+    "hip hop": "Hip-Hop",
+    "hiphop": "Hip-Hop",
+    "rap": "Hip-Hop",
+    "rnb": "R&B",
+    "r and b": "R&B",
+    "electronic": "Edm",
+    "lofi": "Lo-Fi",
+    "lo fi": "Lo-Fi",
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _fold(value: str) -> str:
+    """Lookup key for a free-form value; models repeat a few spellings, so results are memoized"""
+    return value.strip().casefold()
+
+
+def _build_lut(pairs: Iterable[Tuple[str, str]]) -> Mapping[str, str]:
+    """Read-only table from folded, interned spellings to canonical values"""
+    return MappingProxyType({sys.intern(_fold(key)): canonical for key, canonical in pairs})
+
+
+# Lookup tables are built once at import
+_GENRE_LUT = _build_lut([*zip(VALID_GENRES, VALID_GENRES), *GENRE_ALIASES.items()])
+# Longest keys first, so "hip hop" wins over any shorter key it contains
+_GENRE_SUBSTRINGS: Tuple[Tuple[str, str], ...] = tuple(
+    sorted(_GENRE_LUT.items(), key=lambda item: len(item[0]), reverse=True)
+)
+_MOOD_LUT = _build_lut(zip(VALID_MOODS, VALID_MOODS))
+_LANGUAGE_LUT = _build_lut(zip(VALID_LANGUAGES, VALID_LANGUAGES))
+# Bound lookups, saving the attribute fetch on every normalized field
+_lookup_genre = _GENRE_LUT.get
+_lookup_mood = _MOOD_LUT.get
+_lookup_language = _LANGUAGE_LUT.get
+
+
+def _build_word_pattern(lut: Mapping[str, str]) -> "re.Pattern[str]":
+    """Compile the keys of `lut` into one regex alternation anchored at a word start, longest keys first"""
+    keys = sorted(lut, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, keys)) + ")")
+
+
+# Unlike genres ("synthpop" is Pop), moods and languages only match at a word start,
+# so "unhappy" stays unknown while "sadness" is still Sad
+_MOOD_RE = _build_word_pattern(_MOOD_LUT)
+_LANGUAGE_RE = _build_word_pattern(_LANGUAGE_LUT)
+
+
+def _search(pattern: "re.Pattern[str]", lut: Mapping[str, str], key: str) -> Optional[str]:
+    """Return the canonical value of the leftmost, longest key of `lut` found in `key`"""
+    match = pattern.search(key)
+    return lut[match.group()] if match else None
+
+
+def _substring_lookup(key: str) -> Optional[str]:
+    """Return the canonical genre of the longest known key contained in `key`"""
+    # `key` is the model's short genre field, where scanning a few dozen keys with
+    # `in` beats building and walking an Aho-Corasick automaton
+    for substring, canonical in _GENRE_SUBSTRINGS:
+        if substring in key:
+            return canonical
+    return None
+
+
+def _normalize_genre(genre: str) -> str:
+    """Map a free-form genre onto VALID_GENRES, keeping unknown genres as-is"""
+    key = _fold(genre)
+    return _lookup_genre(key) or _substring_lookup(key) or genre
+
+
+def _normalize_mood(mood: str) -> str:
+    """Map a free-form mood onto VALID_MOODS, "Unknown" when none is mentioned"""
+    key = _fold(mood)
+    return _lookup_mood(key) or _search(_MOOD_RE, _MOOD_LUT, key) or "Unknown"
+
+
+def _normalize_language(language: str) -> str:
+    """Map a free-form language onto VALID_LANGUAGES, "Unknown" when none is mentioned"""
+    key = _fold(language)
+    return _lookup_language(key) or _search(_LANGUAGE_RE, _LANGUAGE_LUT, key) or "Unknown"
+
+
+def _current_year() -> int:
+    """Current year, re-read from the clock at most once per YEAR_TTL"""
+    now = time.monotonic()
+    if now - _YEAR_CACHE[1] > YEAR_TTL:
+        _YEAR_CACHE[:] = [datetime.now().year, now]
+    return _YEAR_CACHE[0]
+
+
+def _normalize_year(year: Any) -> int:
+    """Expand two-digit years and replace implausible ones with the current year"""
+    year = int(year)
+    if 0 <= year < 100:
+        year += 2000
+    current_year = _current_year()
+    return year if MIN_YEAR <= year <= current_year else current_year
+
+
+def _normalize_limit(limit: Any) -> int:
+    return min(max(int(limit), 1), MAX_LIMIT)
+
+
+_YEAR_RE = re.compile(r"(19|20)\d{2}")
+
+
+def _extract_trivial(text_key: str) -> Optional[MusicMetadata]:
+    """Build metadata without the model for a bare genre, year or count; None otherwise"""
+    # Folded inline: whole user messages are mostly unique and would evict the model's
+    # repeated spellings from the _fold cache
+    genre = _lookup_genre(text_key.strip().casefold())
+    if genre:
+        return MusicMetadata(track=TrackMetadata(genre=genre))
+    if _YEAR_RE.fullmatch(text_key):
+        return MusicMetadata(track=TrackMetadata(year=_normalize_year(text_key)))
+    # isdigit() also accepts "²", which int() rejects
+    if text_key.isdecimal() and int(text_key) <= 100:
+        return MusicMetadata(limit=_normalize_limit(text_key))
+    return None
+
+
+def _normalize(output: Dict[str, Any], compact: bool = False) -> Dict[str, Any]:
+    """
+    Normalize raw jsonformer output into values accepted by MusicMetadata
+
+    In compact mode None values and records left empty are dropped while copying,
+    so the output is not walked a second time
+    """
+    result: Dict[str, Any] = {}
+
+    track = output.get("track")
+    if track:
+        track = {k: v for k, v in track.items() if v is not None} if compact else dict(track)
+        if track.get("genre"):
+            track["genre"] = _normalize_genre(track["genre"])
+        if track.get("mood"):
+            track["mood"] = _normalize_mood(track["mood"])
+        if track.get("year") is not None:
+            track["year"] = _normalize_year(track["year"])
+        if track:
+            result["track"] = track
+
+    artist = output.get("artist")
+    if isinstance(artist, list):
+        # Older schema generated an array of artists, keep the first one
+        artist = artist[0] if artist else None
+    if artist:
+        artist = {k: v for k, v in artist.items() if v is not None} if compact else dict(artist)
+        if artist.get("language"):
+            artist["language"] = _normalize_language(artist["language"])
+        if artist:
+            result["artist"] = artist
+
+    if output.get("limit") is not None:
+        result["limit"] = _normalize_limit(output["limit"])
+
+    return result
+
+
+# lru_cache alone lets concurrent first callers each miss and load their own copy
+_MODEL_LOCK = threading.Lock()
+
+
+def _load_model(model_name: str, trust_remote_code: bool = True, load_in_4bit: bool = False):
+    """Load tokenizer and model weights once per process, in bf16 on GPU when available"""
+    with _MODEL_LOCK:
+        return _load_model_once(model_name, trust_remote_code, load_in_4bit)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_model_once(model_name: str, trust_remote_code: bool, load_in_4bit: bool):
+    # torch and transformers take seconds to import, only pay for them when a local model is used
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=trust_remote_code)
+    tokenizer.padding_side = "left"
+
+    model_kwargs: Dict[str, Any] = {"trust_remote_code": trust_remote_code, "device_map": "auto"}
+    if torch.cuda.is_available():
+        model_kwargs["torch_dtype"] = torch.bfloat16
+        if load_in_4bit:
+            model_kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.bfloat16,
+            )
+    model = AutoModelForCausalLM.from_pretrained(model_name, **model_kwargs)
+    model.eval()
+    return tokenizer, model
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _fingerprint(text: str) -> int:
+    """Cache key that ignores case, punctuation and spacing but keeps word order"""
+    folded = text.casefold()
+    # Texts without word characters ("😢🎹", "🔥🎸") would all share the empty token
+    # string; they are keyed on the whitespace-collapsed text itself instead, which
+    # cannot collide with a token string since it holds no word characters
+    tokens = " ".join(_TOKEN_RE.findall(folded)) or " ".join(folded.split())
+    # 64 bits keep collisions negligible at cache sizes in the thousands; a small int
+    # takes a third of the memory of a hex digest and hashes for free
+    return int.from_bytes(hashlib.blake2b(tokens.encode(), digest_size=8).digest(), "little")
+
+
+def _run_jsonformer(tokenizer, model, prompt: str, json_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate one JSON object following `json_schema` with a local HuggingFace model"""
+    import torch
+    from jsonformer import Jsonformer
+
+    builder = Jsonformer(
+        tokenizer=tokenizer,
+        model=model,
+        prompt=prompt,
+        json_schema=json_schema,
+    )
+    # Jsonformer calls model.forward directly, keep it from recording autograd state
+    with torch.inference_mode():
+        return builder()
+
+
+class VLLMGenerator:
+    """Schema-constrained generation through a vLLM OpenAI-compatible server"""
+
+    def __init__(self, model_name: str, base_url: str, timeout: float = 60, max_tokens: int = 512):
+        """
+        Initialization module
+
+        Args:
+            model_name (str): Model served by vLLM, e.g. "Qwen/Qwen3-4B"
+            base_url (str): Base URL of the vLLM server, e.g. "http://localhost:8000"
+            timeout (float, optional): Request timeout in seconds. Defaults to 60.
+            max_tokens (int, optional): Generation budget per generated object, multiplied by
+                the item count of batch schemas. Defaults to 512.
+        """
+        self.model_name = model_name
+        self.url = f"{base_url.rstrip('/')}/v1/completions"
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.session = requests.Session()
+
+    @staticmethod
+    def _object_count(json_schema: Dict[str, Any]) -> int:
+        """Number of objects `json_schema` asks for: the largest maxItems of its top-level arrays, else 1"""
+        properties = json_schema.get("properties", {}).values()
+        return max((prop.get("maxItems", 1) for prop in properties if prop.get("type") == "array"), default=1)
+
+    def __call__(self, prompt: str, json_schema: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            # A batch of ten objects cut off at a single object's budget is invalid JSON
+            "max_tokens": self.max_tokens * self._object_count(json_schema),
+            "temperature": 0,
+            "guided_json": json_schema,
+        }
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return json.loads(response.json()["choices"][0]["text"])
+
+
+class TextExtractor:
+    """Service to extract music metadata from user text"""
+
+    __slots__ = (
+        "jsonformer",
+        "compact",
+        "schema",
+        "prompt",
+        "batch_prompt",
+        "batch_schema",
+        "_prompt_template",
+        "_batch_prompt_template",
+        "trust_remote_code",
+        "load_in_4bit",
+        "tokenizer",
+        "model",
+        "cache_size",
+        "_cache",
+        "_cache_lock",
+    )
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        schema: Dict[str, Any] = SCHEMA,
+        prompt: str = PROMPT,
+        batch_prompt: str = BATCH_PROMPT,
+        compact: bool = False,
+        jsonformer: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None,
+        **kwargs,
+    ):
+        """
+        Initialization module
+
+        Args:
+            model_name (str, optional): HuggingFace model name, e.g. "moonshotai/Kimi-K2.5". Defaults to DEFAULT_MODEL_NAME.
+            schema (Dict[str, Any], optional): JSON Schema to guide extraction. Defaults to SCHEMA.
+            prompt (str, optional): Prompt to guide extraction. Defaults to PROMPT.
+            batch_prompt (str, optional): Prompt to guide extraction of several texts at once. Defaults to BATCH_PROMPT.
+            compact (bool, optional): Whether to drop None fields from dictionary output. Defaults to False.
+            jsonformer (Callable, optional): Callable taking (prompt, schema) and returning the generated JSON.
+                Defaults to VLLMGenerator when `vllm_url` is set, otherwise Jsonformer running `model_name` locally.
+            vllm_url (str, optional): Base URL of a vLLM server serving `model_name`. Defaults to $VLLM_BASE_URL.
+            load_in_4bit (bool, optional): Quantize local model weights to 4-bit with bitsandbytes on GPU. Defaults to False.
+            cache_size (int, optional): Number of extraction results kept in memory, 0 disables caching. Defaults to 512.
+        """
+        vllm_url = kwargs.get("vllm_url", os.environ.get("VLLM_BASE_URL"))
+        if jsonformer is None and vllm_url:
+            jsonformer = VLLMGenerator(model_name, vllm_url)
+        if jsonformer is None:
+            self.trust_remote_code = kwargs.get("trust_remote_code", True)
+            self.load_in_4bit = kwargs.get("load_in_4bit", False)
+            self.tokenizer, self.model = _load_model(model_name, self.trust_remote_code, self.load_in_4bit)
+            jsonformer = functools.partial(_run_jsonformer, self.tokenizer, self.model)
+
+        self.jsonformer = jsonformer
+        self.compact = compact
+        self.schema = schema
+        self.prompt = prompt
+        self.batch_prompt = batch_prompt
+        # Schema and compact are fixed per extractor, so only the input text is substituted per call
+        schema_json = json.dumps(schema)
+        self._prompt_template = prompt.replace("{schema}", schema_json).replace("{compact}", str(compact))
+        self._batch_prompt_template = batch_prompt.replace("{schema}", schema_json)
+        self.batch_schema = {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": schema}},
+        }
+
+        # Results keyed by input fingerprint, least recently used first
+        self.cache_size = kwargs.get("cache_size", 512)
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, key: int) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            raw = self._cache.get(key)
+            if raw is None:
+                return None
+            self._cache.move_to_end(key)
+        return copy.deepcopy(raw)
+
+    def _cache_put(self, key: int, raw: Dict[str, Any]) -> None:
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[key] = copy.deepcopy(raw)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_clear(self) -> None:
+        """Forget every cached extraction result"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _extract_raw(self, user_input: str) -> Dict[str, Any]:
+        """
+        Return normalized fields for `user_input`, without None values in compact mode
+
+        Served from the cache when a text with the same fingerprint was extracted before.
+        Raises whatever the model call raises, so callers decide how to report failures
+        """
+        key = _fingerprint(user_input)
+        raw = self._cache_get(key)
+        if raw is None:
+            raw = self._generate_raw(user_input)
+            self._cache_put(key, raw)
+        return raw
+
+    def _generate_raw(self, user_input: str) -> Dict[str, Any]:
+        """Run the model once for `user_input` and normalize its output"""
+        jsonformer, schema, compact = self.jsonformer, self.schema, self.compact
+        prompt = self._prompt_template.replace("{text}", user_input)
+        start_time = time.time()
+        output = jsonformer(prompt, schema)
+        if logger.isEnabledFor(DEBUG):
+            # highlight_values pretty-prints to stdout, only worth it while debugging
+            from jsonformer import highlight_values
+
+            highlight_values(output)
+        logger.debug("Extraction time: %.2f seconds", time.time() - start_time)
+        return _normalize(output, compact=compact)
+
+    def extract(self, user_input: str) -> MusicMetadata:
+        """
+        Extract music metadata from user input text
+
+        Args:
+            user_input: Raw text from user
+
+        Returns:
+            MusicMetadata object with extracted fields
+        """
+        if not user_input or user_input.isspace():
+            return MusicMetadata()
+        try:
+            return MusicMetadata.from_dict(self._extract_raw(user_input))
+        except Exception as e:
+            logger.error("Error during extraction: %s, return empty metadata", e)
+            return MusicMetadata()
+
+    def extract_many(self, user_inputs: List[str]) -> List[MusicMetadata]:
+        """
+        Extract music metadata from several texts with a single model call
+
+        Args:
+            user_inputs: Raw texts from users, at most MAX_BATCH_SIZE of them
+
+        Returns:
+            MusicMetadata objects in the same order as `user_inputs`
+        """
+        keys = [_fingerprint(user_input) for user_input in user_inputs]
+        raws = [self._cache_get(key) for key in keys]
+        pending = [i for i, raw in enumerate(raws) if raw is None]
+        try:
+            if pending:
+                generated = self._generate_raw_many([user_inputs[i] for i in pending])
+                for i, raw in zip(pending, generated):
+                    raws[i] = raw
+                    self._cache_put(keys[i], raw)
+            return [MusicMetadata.from_dict(raw) for raw in raws]
+        except Exception as e:
+            logger.warning("Error during batch extraction: %s, extracting texts one by one", e)
+            return [self.extract(user_input) for user_input in user_inputs]
+
+    def _sized_batch_schema(self, count: int) -> Dict[str, Any]:
+        """batch_schema asking for exactly `count` results, so generation budgets follow the batch size"""
+        results = dict(self.batch_schema["properties"]["results"], minItems=count, maxItems=count)
+        return {"type": "object", "properties": {"results": results}}
+
+    def _generate_raw_many(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """Run the model once for all `user_inputs` and normalize each of its results"""
+        texts = "\n".join(f"{i}. {text}" for i, text in enumerate(user_inputs, 1))
+        prompt = self._batch_prompt_template.replace("{texts}", texts)
+        start_time = time.time()
+        results = self.jsonformer(prompt, self._sized_batch_schema(len(user_inputs)))["results"]
+        logger.debug("Batch extraction time: %.2f seconds", time.time() - start_time)
+        if len(results) != len(user_inputs):
+            raise ValueError(f"expected {len(user_inputs)} results, got {len(results)}")
+        compact = self.compact
+        return [_normalize(result, compact=compact) for result in results]
+
+    def extract_to_dict(self, user_input: str) -> Dict[str, Any]:
+        """
+        Extract music metadata from user input text as a dictionary
+
+        Args:
+            user_input: Raw text from user
+
+        Returns:
+            Dictionary of extracted fields, without None values in compact mode
+        """
+        if not self.compact:
+            return self.extract(user_input).to_dict()
+        # Same blank-input guard as extract(), which the compact path does not go through
+        if not user_input or user_input.isspace():
+            return {}
+        try:
+            return self._extract_raw(user_input)
+        except Exception as e:
+            logger.error("Error during extraction: %s, return empty metadata", e)
+            return {}
+
+
+_EXTRACTORS: Dict[bool, TextExtractor] = {}
+_EXTRACTORS_LOCK = threading.Lock()
+
+
+def _get_extractor(compact: bool) -> TextExtractor:
+    """Shared extractor per compact mode, so the model is not rebuilt per request"""
+    extractor = _EXTRACTORS.get(compact)
+    if extractor is None:
+        # Request threads arrive together on a cold start, only one of them builds it
+        with _EXTRACTORS_LOCK:
+            extractor = _EXTRACTORS.get(compact)
+            if extractor is None:
+                extractor = _EXTRACTORS[compact] = TextExtractor(compact=compact)
+    return extractor
+
+
+def cache_clear() -> None:
+    """Drop the shared extractors and with them their result caches; the model stays loaded"""
+    with _EXTRACTORS_LOCK:
+        _EXTRACTORS.clear()
+
+
+def extract_text(text: str, compact: bool = False):
+    """
+    Extract music metadata from user input text, reusing results of near-identical inputs
+
+    Args:
+        text: Raw text from user
+        compact: Whether to return a dictionary without None values
+
+    Returns:
+        Dictionary when compact, otherwise MusicMetadata object
+    """
+    # Blank input never reaches key building or the model
+    if not text or text.isspace():
+        return {} if compact else MusicMetadata()
+
+    # The model sees the original case, but the result cache fingerprint casefolds, so
+    # texts differing only in case reuse the names extracted from the first spelling
+    text_key = " ".join(text.split())
+
+    metadata = _extract_trivial(text_key)
+    if metadata is not None:
+        return metadata.to_dict(True) if compact else metadata
+
+    try:
+        raw = _get_extractor(compact)._extract_raw(text_key)
+        return raw if compact else MusicMetadata.from_dict(raw)
+    except Exception as e:
+        logger.error("Error during extraction: %s, return empty metadata", e)
+        return {} if compact else MusicMetadata()
+
+
+def extract_many(texts: List[str]) -> List[MusicMetadata]:
+    """
+    Extract music metadata from several non-empty texts in one model call
+
+    Args:
+        texts: Raw texts from users, at most MAX_BATCH_SIZE of them
+
+    Returns:
+        MusicMetadata objects in the same order as `texts`
+    """
+    results = [_extract_trivial(" ".join(text.split())) for text in texts]
+    pending = [text for text, result in zip(texts, results) if result is None]
+    if not pending:
+        # Trivial inputs only, the extractor (and its model) is never needed
+        return results
+    extracted = iter(_get_extractor(False).extract_many(pending))
+    return [result if result is not None else next(extracted) for result in results]
+
+
+# Shared by every extract_text_batch call, concurrent requests wait for the same workers
+_CHUNK_POOL = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHUNKS, thread_name_prefix="extract-chunk")
+
+
+def extract_text_batch(texts: List[str], compact: bool = False) -> list:
+    """
+    Extract music metadata from any number of texts, one model call per MAX_BATCH_SIZE distinct texts,
+    with at most MAX_CONCURRENT_CHUNKS such calls running in the process at once
+
+    Args:
+        texts: Raw texts from users, possibly empty or repeated
+        compact: Return dictionaries without None values instead of MusicMetadata objects
+
+    Returns:
+        One result per entry of `texts`, in order; empty texts get empty metadata
+    """
+    keys = [" ".join(text.split()) if text else "" for text in texts]
+    distinct = list(dict.fromkeys(key for key in keys if key))
+    chunks = [distinct[i:i + MAX_BATCH_SIZE] for i in range(0, len(distinct), MAX_BATCH_SIZE)]
+    # Even a single chunk goes through the pool, so MAX_CONCURRENT_CHUNKS bounds the
+    # batched model calls of the whole process, not of one request
+    chunk_results = _CHUNK_POOL.map(extract_many, chunks)
+    extracted: Dict[str, MusicMetadata] = {}
+    for chunk, results in zip(chunks, chunk_results):
+        extracted.update(zip(chunk, results))
+
+    if compact:
+        return [extracted[key].to_dict(True) if key else {} for key in keys]
+    # Metadata is immutable, repeated texts can share one object
+    return [extracted[key] if key else MusicMetadata() for key in keys]
+
+
+# For manual testing
+def main():
+    extractor = TextExtractor(model_name=DEFAULT_MODEL_NAME, compact=True)
+    examples = [
+        {
+            "input": "Mình đang tìm một bài pop buồn của Taylor Swift, phát hành khoảng năm 2020.",
+            "output": {"track": {"genre": "Pop", "mood": "Sad", "year": 2020}, "artist": {"name": "Taylor Swift"}},
+        },
+        {
+            "input": "Gợi ý cho tôi 5 bài nhạc jazz nhẹ nhàng để nghe buổi tối.",
+            "output": {"track": {"genre": "Jazz", "mood": "Calm"}, "limit": 5},
+        },
+        {
+            "input": "Tôi muốn nghe bài “Yellow” của Coldplay, ban nhạc đến từ Anh.",
+            "output": {"track": {"name": "Yellow"}, "artist": {"name": "Coldplay", "country": "UK"}},
+        },
+        {
+            "input": "Có bài nhạc EDM nào nghe sôi động để tập gym không?",
+            "output": {"track": {"genre": "Edm", "mood": "Energetic"}},
+        },
+        {
+            "input": "Cho mình khoảng 3 bài nhạc phát hành năm 2018, nghe thư giãn là được.",
+            "output": {"track": {"mood": "Calm", "year": 2018}, "other": {"limit": 3}},
+        },
+    ]
+    
+    for example in examples:
+        result = extractor.extract_to_dict(example["input"])
+        assert result == example["output"], f"Failed for input: {example['input']}, target: {example['output']}, predict: {result}"
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Gunicorn configuration for extract-text module"""
+
+import multiprocessing
+import os
+
+bind = "0.0.0.0:5001"
+# uvicorn.workers is deprecated in favour of the standalone uvicorn-worker package
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Every worker holds its own copy of a locally loaded model, so only scale out
+# by default when generation runs on a separate vLLM server
+_default_workers = multiprocessing.cpu_count() * 2 + 1 if os.environ.get("VLLM_BASE_URL") else 1
+workers = int(os.environ.get("EXTRACT_TEXT_WORKERS", _default_workers))
+
+# Extractions are LLM-bound, leave room for slow generations
+timeout = 60
+keepalive = 5
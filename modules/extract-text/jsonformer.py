@@ -85,19 +85,33 @@ class NumberStoppingCriteria(StoppingCriteria):
         return False
 
 
+# id(tokenizer) -> (tokenizer, mask); the tokenizer is kept so its id cannot be reused
+_NUMBER_TOKEN_MASKS: Dict[int, Any] = {}
+
+
+def _number_token_mask(tokenizer: PreTrainedTokenizer) -> torch.Tensor:
+    """Mask of the tokens allowed while generating a number, built once per tokenizer"""
+    cached = _NUMBER_TOKEN_MASKS.get(id(tokenizer))
+    if cached is not None and cached[0] is tokenizer:
+        return cached[1]
+
+    # Decodes the whole vocabulary, far too slow to redo for every generated object
+    mask = torch.zeros(len(tokenizer), dtype=torch.bool)
+    for token, token_id in tokenizer.get_vocab().items():
+        token_str = tokenizer.decode(token_id).strip()
+
+        if token_str == "" or (all(c.isdigit() or c == "." for c in token_str) and token_str.count(".") <= 1):
+            mask[token_id] = True
+
+    _NUMBER_TOKEN_MASKS[id(tokenizer)] = (tokenizer, mask)
+    return mask
+
+
 class OutputNumbersTokens(LogitsProcessor):
     def __init__(self, tokenizer: PreTrainedTokenizer, prompt: str):
         self.tokenizer = tokenizer
         self.tokenized_prompt = tokenizer(prompt, return_tensors="pt")
-
-        vocab_size = len(tokenizer)
-        self.allowed_mask = torch.zeros(vocab_size, dtype=torch.bool)
-
-        for token, token_id in tokenizer.get_vocab().items():
-            token_str = tokenizer.decode(token_id).strip()
-
-            if token_str == "" or (all(c.isdigit() or c == "." for c in token_str) and token_str.count(".") <= 1):
-                self.allowed_mask[token_id] = True
+        self.allowed_mask = _number_token_mask(tokenizer)
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor):
         mask = self.allowed_mask.to(scores.device)
@@ -125,6 +139,10 @@ class Jsonformer:
         self.tokenizer = tokenizer
         self.json_schema = json_schema
         self.prompt = prompt
+        # The schema never changes during generation, serialize it once rather than per token step
+        self.prompt_prefix = (
+            f"{prompt}\nOutput result in the following JSON schema format:\n{json.dumps(json_schema)}\nResult: "
+        )
 
         self.number_logit_processor = LogitsProcessorList([OutputNumbersTokens(self.tokenizer, self.prompt)])
 
@@ -300,7 +318,6 @@ class Jsonformer:
         return obj
 
     def get_prompt(self):
-        template = """{prompt}\nOutput result in the following JSON schema format:\n{schema}\nResult: {progress}"""
         progress = json.dumps(self.value)
         gen_marker_index = progress.find(f'"{self.generation_marker}"')
         if gen_marker_index != -1:
@@ -308,13 +325,7 @@ class Jsonformer:
         else:
             raise ValueError("Failed to find generation marker")
 
-        prompt = template.format(
-            prompt=self.prompt,
-            schema=json.dumps(self.json_schema),
-            progress=progress,
-        )
-
-        return prompt
+        return self.prompt_prefix + progress
 
     def __call__(self) -> Dict[str, Any]:
         self.value = {}
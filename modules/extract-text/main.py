@@ -1,12 +1,22 @@
 """Main entry point for extract-text module"""
 
-from app import app
+import os
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 def main():
-    """Start the extract-text service"""
+    """Start the extract-text service under gunicorn with uvicorn workers"""
     print("Starting extract-text service...")
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    os.execvp(
+        "gunicorn",
+        [
+            "gunicorn",
+            "--chdir", MODULE_DIR,
+            "-c", os.path.join(MODULE_DIR, "gunicorn_conf.py"),
+            "app:app",
+        ],
+    )
 
 
 if __name__ == "__main__":
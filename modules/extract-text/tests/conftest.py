@@ -0,0 +1,18 @@
+# Shared pytest configuration for the extract-text tests.
+# The module directory is put on sys.path by `pythonpath` in pyproject.toml, or by the
+# repository root pytest.ini when pytest runs from there.
+import pytest
+
+
+@pytest.fixture(scope="session")
+def real_extractor():
+    """Extractor backed by the real local model, loaded once for every integration test"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from extractor import TextExtractor
+
+    try:
+        return TextExtractor(compact=True)
+    except OSError as e:
+        # from_pretrained raises OSError when the weights are neither cached nor downloadable
+        pytest.skip(f"model could not be loaded: {e}")
@@ -0,0 +1,78 @@
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+import extractor as extractor_module
+from extractor import MusicMetadata, TextExtractor, TrackMetadata
+
+
+# ------------------
+# Fixtures
+# ------------------
+
+@pytest.fixture
+def client():
+    return TestClient(app_module.app)
+
+
+@pytest.fixture
+def extract_text(monkeypatch):
+    extract_text = Mock(return_value=MusicMetadata(track=TrackMetadata(genre="Jazz")))
+    monkeypatch.setattr(app_module, "extract_text", extract_text)
+    return extract_text
+
+
+# ------------------
+# Tests
+# ------------------
+
+def test_extract_sets_etag_and_revalidates(client, extract_text):
+    response = client.post("/extract", json={"text": "some jazz", "user_id": "1"})
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"track": {"genre": "Jazz"}}
+    assert response.headers["cache-control"] == f"max-age={app_module.CACHE_MAX_AGE}"
+
+    revalidated = client.post(
+        "/extract",
+        json={"text": "some jazz", "user_id": "1"},
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+
+    assert revalidated.status_code == 304
+    assert extract_text.call_count == 1
+
+
+def test_extract_empty_result_is_not_cacheable(client, extract_text):
+    extract_text.return_value = MusicMetadata()
+
+    response = client.post("/extract", json={"text": "model is down", "user_id": "1"})
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {}
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-store"
+
+
+def test_extract_batch_dedupes_through_extract_text_batch(client, monkeypatch):
+    jsonformer = Mock(return_value={"results": [{"limit": 3}, {"track": {"genre": "jazz"}}]})
+    extractor = TextExtractor(jsonformer=jsonformer)
+    monkeypatch.setattr(extractor_module, "_get_extractor", lambda compact: extractor)
+
+    response = client.post("/extract/batch", json={"texts": [
+        {"text": "three songs", "user_id": "1"},
+        {"text": "", "user_id": "2"},
+        {"text": "three  songs", "user_id": "3"},
+        {"text": "some smooth jazz", "user_id": "4"},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"user_id": "1", "data": {"limit": 3}},
+        {"user_id": "2", "data": {}},
+        {"user_id": "3", "data": {"limit": 3}},
+        {"user_id": "4", "data": {"track": {"genre": "Jazz"}}},
+    ]
+    jsonformer.assert_called_once()
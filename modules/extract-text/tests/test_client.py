@@ -0,0 +1,175 @@
+import asyncio
+import io
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp import web
+
+from client import ArtistInfo, AsyncExtractTextClient, ExtractTextClient, ExtractedMetadata, TrackInfo
+
+
+# ------------------
+# Fixtures
+# ------------------
+
+@pytest.fixture
+def client():
+    client = ExtractTextClient("http://extract-text")
+    client.session = MagicMock()
+    return client
+
+
+async def _stub_health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def _stub_extract(request):
+    text = (await request.json())["text"]
+    if text == "fail":
+        return web.json_response({"success": False, "message": "boom"}, status=500)
+    return web.json_response({"success": True, "data": {"artist": {"name": text, "language": "English"}}})
+
+
+async def _stub_extract_batch(request):
+    texts = (await request.json())["texts"]
+    results = [{"user_id": item.get("user_id"), "data": {"limit": len(item["text"])}} for item in texts]
+    return web.json_response({"success": True, "results": results})
+
+
+@pytest.fixture(scope="module")
+def service_url():
+    """Stub extract-text service on its own event loop thread, so each test can asyncio.run freely"""
+    app = web.Application()
+    app.router.add_get("/health", _stub_health)
+    app.router.add_post("/extract", _stub_extract)
+    app.router.add_post("/extract/batch", _stub_extract_batch)
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{port}"
+
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def make_response(status_code=200, body=b"", json=None):
+    response = MagicMock(status_code=status_code, raw=io.BytesIO(body))
+    response.json.return_value = json
+    response.__enter__.return_value = response
+    return response
+
+
+# ------------------
+# Tests
+# ------------------
+
+def test_extract_batch_streams_results(client):
+    client.session.post.return_value = make_response(
+        body=b'{"success": true, "results": [{"user_id": "1", "data": {"limit": 3}}, {"user_id": "2", "data": {}}]}'
+    )
+
+    results = client.extract_batch([{"text": "three songs", "user_id": "1"}, {"text": "", "user_id": "2"}])
+
+    assert results == [{"user_id": "1", "data": {"limit": 3}}, {"user_id": "2", "data": {}}]
+
+
+def test_extract_batch_truncated_response_returns_nothing(client):
+    client.session.post.return_value = make_response(
+        body=b'{"success": true, "results": [{"user_id": "1", "data": {"limit": 3}}, {"user_id"'
+    )
+
+    assert client.extract_batch([{"text": "a"}, {"text": "b"}]) == []
+
+
+def test_extract_raw_caches_results(client):
+    client.session.post.return_value = make_response(json={"success": True, "data": {"limit": 3}})
+
+    first = client.extract_raw("three songs")
+    second = client.extract_raw("three songs")
+
+    assert client.session.post.call_count == 1
+    assert first == second == {"limit": 3}
+    assert first is not second
+
+
+def test_extract_raw_does_not_cache_empty_data(client):
+    client.session.post.side_effect = [
+        make_response(json={"success": True, "data": {}}),
+        make_response(json={"success": True, "data": {"limit": 3}}),
+    ]
+
+    assert client.extract_raw("three songs") == {}
+    assert client.extract_raw("three songs") == {"limit": 3}
+
+
+def test_extract_parses_the_service_schema(client):
+    client.session.post.return_value = make_response(json={"success": True, "data": {
+        "track": {"name": "Hello", "genre": "Pop", "tempo": "slow"},
+        "artist": {"name": "Adele", "language": "English"},
+        "limit": 3,
+    }})
+
+    metadata = client.extract("Hello by Adele")
+
+    assert metadata == ExtractedMetadata(
+        track=TrackInfo(name="Hello", genre="Pop"),
+        artist=ArtistInfo(name="Adele", language="English"),
+        limit=3,
+    )
+
+
+
+def run_and_close(client, coroutine):
+    """asyncio.run `coroutine`, then close `client` on the same loop"""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+def test_async_client_survives_a_new_event_loop(service_url):
+    client = AsyncExtractTextClient(service_url)
+
+    # Each asyncio.run() closes its loop; the session must not outlive it
+    assert asyncio.run(client.health_check())
+    assert asyncio.run(client.extract_raw("Adele")) == {"artist": {"name": "Adele", "language": "English"}}
+    assert run_and_close(client, client.health_check())
+
+
+def test_async_extract_parses_the_service_schema(service_url):
+    client = AsyncExtractTextClient(service_url)
+
+    metadata = run_and_close(client, client.extract("Adele"))
+
+    assert metadata == ExtractedMetadata(artist=ArtistInfo(name="Adele", language="English"))
+
+
+def test_async_extract_batch_returns_results_in_order(service_url):
+    client = AsyncExtractTextClient(service_url)
+
+    results = run_and_close(client, client.extract_batch([{"text": "abc", "user_id": "1"}, {"text": "a"}]))
+
+    assert results == [{"user_id": "1", "data": {"limit": 3}}, {"user_id": None, "data": {"limit": 1}}]
+
+
+def test_async_client_reports_failures_as_none(service_url):
+    client = AsyncExtractTextClient(service_url)
+    assert run_and_close(client, client.extract_raw("fail")) is None
+
+    # Nothing listens on port 1
+    unreachable = AsyncExtractTextClient("http://127.0.0.1:1")
+    assert run_and_close(unreachable, unreachable.extract_raw("Adele")) is None
+    assert run_and_close(unreachable, unreachable.health_check()) is False
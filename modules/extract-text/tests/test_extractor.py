@@ -1,13 +1,37 @@
-import sys
+import json
+import threading
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import attrgetter
 from unittest.mock import Mock
 
-sys.path.append("../")
-
+import extractor as extractor_module
 from extractor import TextExtractor, MusicMetadata
 
 
+class StubJsonformer:
+    """Minimal stand-in for the jsonformer callable, mirroring the Mock attributes tests use"""
+
+    __slots__ = ("return_value", "side_effect", "call_count")
+
+    def __init__(self, return_value=None, side_effect=None):
+        self.return_value = return_value
+        self.side_effect = side_effect
+        self.call_count = 0
+
+    def __call__(self, prompt, schema=None):
+        self.call_count += 1
+        effect = self.side_effect
+        if isinstance(effect, list):
+            # One queued outcome per call
+            effect = effect.pop(0)
+        if isinstance(effect, BaseException):
+            raise effect
+        return self.return_value if effect is None else effect
+
+
 # ------------------
 # Fixtures
 # ------------------
@@ -31,22 +55,49 @@ def mock_jsonformer_output():
 
 @pytest.fixture
 def extractor():
-    fake_jsonformer = Mock()
+    fake_jsonformer = StubJsonformer()
     return TextExtractor(
         compact=False,
         jsonformer=fake_jsonformer,
     )
 
 
+@pytest.fixture(scope="module")
+def shared_extractor():
+    # Reused across parametrized cases that only set return_value, so nothing may be cached
+    return TextExtractor(
+        compact=False,
+        jsonformer=StubJsonformer(),
+        cache_size=0,
+    )
+
+
 @pytest.fixture
 def compact_extractor():
-    fake_jsonformer = Mock()
+    fake_jsonformer = StubJsonformer()
     return TextExtractor(
         compact=True,
         jsonformer=fake_jsonformer,
     )
 
 
+@pytest.fixture
+def model_stub(monkeypatch):
+    """Stub behind the module-level helpers, shared by the extractors of both compact modes"""
+    fake_jsonformer = StubJsonformer()
+    extractors = {compact: TextExtractor(compact=compact, jsonformer=fake_jsonformer) for compact in (False, True)}
+    monkeypatch.setattr(extractor_module, "_get_extractor", extractors.__getitem__)
+    return fake_jsonformer
+
+
+@pytest.fixture
+def get_extractor(monkeypatch):
+    """Mock in place of _get_extractor, for tests asserting the model is never reached"""
+    get_extractor = Mock()
+    monkeypatch.setattr(extractor_module, "_get_extractor", get_extractor)
+    return get_extractor
+
+
 # ------------------
 # Tests
 # ------------------
@@ -69,6 +120,29 @@ def test_extract_basic_normalization(extractor, mock_jsonformer_output):
     assert result.limit == 5
 
 
+def test_genre_substring_fallback():
+    assert extractor_module._normalize_genre("sad hip hop song") == "Hip-Hop"
+    assert extractor_module._normalize_genre("Heavy Metal") == "Metal"
+    # The longest key wins, not the leftmost one
+    assert extractor_module._normalize_genre("rock hip hop") == "Hip-Hop"
+    assert extractor_module._normalize_genre("jazz hip hop") == "Hip-Hop"
+    assert extractor_module._normalize_genre("synthwave") == "synthwave"
+
+
+@pytest.mark.parametrize(
+    "normalize, value, expected",
+    [
+        ("_normalize_mood", "very happy", "Happy"),
+        ("_normalize_mood", "Sadness", "Sad"),
+        ("_normalize_mood", "unhappy", "Unknown"),
+        ("_normalize_language", "sung in Japanese", "Japanese"),
+        ("_normalize_language", "klingon", "Unknown"),
+    ],
+)
+def test_mood_and_language_fuzzy_match(normalize, value, expected):
+    assert getattr(extractor_module, normalize)(value) == expected
+
+
 def test_compact_mode_removes_none_fields(compact_extractor, mock_jsonformer_output):
     mock_jsonformer_output["artist"] = None
     compact_extractor.jsonformer.return_value = mock_jsonformer_output
@@ -80,40 +154,243 @@ def test_compact_mode_removes_none_fields(compact_extractor, mock_jsonformer_out
     assert result["track"]["genre"] == "Hip-Hop"
 
 
-def test_limit_out_of_range(extractor):
-    extractor.jsonformer.return_value = {"limit": 99}
+@pytest.mark.parametrize("text", ["", "   "])
+def test_compact_extract_to_dict_skips_blank_input(compact_extractor, text):
+    assert compact_extractor.extract_to_dict(text) == {}
+    assert compact_extractor.jsonformer.call_count == 0
 
-    result = extractor.extract("test")
 
-    assert result.limit == 10
+@pytest.mark.parametrize(
+    "mock_output, attr_path, expected",
+    [
+        ({"limit": 99}, "limit", 10),
+        ({"track": {"year": 1800}}, "track.year", datetime.now().year),
+        ({"track": {"mood": "weird"}}, "track.mood", "Unknown"),
+        ({"artist": {"language": "klingon"}}, "artist.language", "Unknown"),
+    ],
+)
+def test_out_of_vocabulary_values_are_normalized(shared_extractor, mock_output, attr_path, expected):
+    shared_extractor.jsonformer.return_value = mock_output
 
+    result = shared_extractor.extract("test")
 
-def test_year_out_of_range(extractor):
-    current_year = datetime.now().year
-    extractor.jsonformer.return_value = {"track": {"year": 1800}}
+    assert attrgetter(attr_path)(result) == expected
 
-    result = extractor.extract("test")
 
-    assert result.track.year == current_year
+def test_current_year_refreshes_when_stale(monkeypatch):
+    monkeypatch.setattr(extractor_module, "_YEAR_CACHE", [1999, float("-inf")])
 
+    # A stale 1999 would clamp 2005 away
+    assert extractor_module._normalize_year(2005) == 2005
+    assert extractor_module._YEAR_CACHE[0] == datetime.now().year
 
-def test_unknown_mood_and_language(extractor):
-    extractor.jsonformer.return_value = {
-        "track": {"mood": "weird"},
-        "artist": {"language": "klingon"},
-    }
 
-    result = extractor.extract("test")
+@pytest.mark.parametrize("text", ["", " ", "   ", "\t\n", "   \u00a0"])
+def test_empty_input_returns_empty_dict(get_extractor, text):
+    assert extractor_module.extract_text(text, compact=True) == {}
+    assert extractor_module.extract_text(text) == MusicMetadata()
+    # extract_text catches exceptions, so only the mock's call record can fail this
+    get_extractor.assert_not_called()
+
+
+def test_extract_text_batch_dedupes(model_stub, mock_jsonformer_output):
+    model_stub.return_value = {"results": [mock_jsonformer_output, {"limit": 3}]}
+
+    results = extractor_module.extract_text_batch(
+        ["a sad song", "", "a  sad song", "three songs please"], compact=True
+    )
+
+    assert model_stub.call_count == 1
+    assert results[0]["track"]["genre"] == "Hip-Hop"
+    assert results[1] == {}
+    assert results[2] == results[0]
+    assert results[3] == {"limit": 3}
+
+
+def test_extract_text_batch_runs_one_call_per_chunk(model_stub):
+    model_stub.return_value = {"results": [{"limit": 3}] * extractor_module.MAX_BATCH_SIZE}
+    texts = [f"text number {i}" for i in range(2 * extractor_module.MAX_BATCH_SIZE)]
+
+    results = extractor_module.extract_text_batch(texts, compact=True)
+
+    assert model_stub.call_count == 2
+    assert results == [{"limit": 3}] * len(texts)
+
+
+def test_extract_text_batch_single_chunk_runs_on_the_shared_pool(monkeypatch):
+    threads = []
+
+    def jsonformer(prompt, schema):
+        threads.append(threading.current_thread().name)
+        return {"results": [{"limit": 3}]}
+
+    shared_extractor = TextExtractor(jsonformer=jsonformer)
+    monkeypatch.setattr(extractor_module, "_get_extractor", lambda compact: shared_extractor)
+
+    assert extractor_module.extract_text_batch(["three songs please"], compact=True) == [{"limit": 3}]
+    # Inline single chunks would escape the MAX_CONCURRENT_CHUNKS bound
+    assert threads[0].startswith("extract-chunk")
+
+
+def test_extract_text_batch_empty(get_extractor):
+    assert extractor_module.extract_text_batch([], compact=True) == []
+    assert extractor_module.extract_text_batch(["", "   "], compact=True) == [{}, {}]
+    get_extractor.assert_not_called()
+
+
+def test_extract_text_caches_repeated_input(model_stub, mock_jsonformer_output):
+    model_stub.return_value = mock_jsonformer_output
+
+    first = extractor_module.extract_text("Hello  by Adele")
+    second = extractor_module.extract_text("hello, by adele!")
+
+    assert model_stub.call_count == 1
+    assert first == second
+    assert first is not second
+
+
+def test_extract_text_retries_after_failure(model_stub):
+    model_stub.side_effect = [Exception("boom"), {"limit": 3}]
 
-    assert result.track.mood == "Unknown"
-    assert result.artist.language == "Unknown"
+    assert extractor_module.extract_text("three songs please", compact=True) == {}
+    assert extractor_module.extract_text("three songs please", compact=True) == {"limit": 3}
 
 
-def test_empty_input_returns_empty_dict():
-    from extractor import extract_text
+def test_cache_separates_inputs_without_words(extractor):
+    extractor.jsonformer.side_effect = [{"track": {"mood": "sad"}}, {"track": {"mood": "energetic"}}]
 
-    assert extract_text("", compact=True) == {}
-    assert extract_text("   ", compact=True) == {}
+    first = extractor.extract("😢🎹")
+    second = extractor.extract("🔥🎸")
+
+    assert extractor.jsonformer.call_count == 2
+    assert (first.track.mood, second.track.mood) == ("Sad", "Energetic")
+
+
+@pytest.fixture
+def fresh_extractors():
+    """No shared extractors before the test, and none of its stubs left behind after it"""
+    extractor_module.cache_clear()
+    yield
+    extractor_module.cache_clear()
+
+
+def test_shared_extractor_is_built_once_under_concurrency(monkeypatch, fresh_extractors):
+    built = []
+
+    def slow_extractor(compact):
+        time.sleep(0.05)
+        built.append(compact)
+        return TextExtractor(compact=compact, jsonformer=StubJsonformer())
+
+    monkeypatch.setattr(extractor_module, "TextExtractor", slow_extractor)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        extractors = list(pool.map(lambda _: extractor_module._get_extractor(False), range(8)))
+
+    assert built == [False]
+    assert all(extractor is extractors[0] for extractor in extractors)
+
+    extractor_module.cache_clear()
+
+    assert extractor_module._get_extractor(False) is not extractors[0]
+    assert built == [False, False]
+
+
+def test_cache_clear_forgets_results(extractor):
+    extractor.jsonformer.return_value = {"limit": 3}
+
+    extractor.extract("three songs please")
+    extractor.cache_clear()
+    extractor.extract("three songs please")
+
+    assert extractor.jsonformer.call_count == 2
+
+
+def test_cache_keeps_word_order_and_evicts(mock_jsonformer_output):
+    fake_jsonformer = StubJsonformer(return_value=mock_jsonformer_output)
+    extractor = TextExtractor(compact=True, jsonformer=fake_jsonformer, cache_size=2)
+
+    extractor.extract_to_dict("Adele not Drake")
+    extractor.extract_to_dict("Drake not Adele")
+    extractor.extract_to_dict("something else")
+    extractor.extract_to_dict("Adele not Drake")
+
+    assert fake_jsonformer.call_count == 4
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Jazz", {"track": {"genre": "Jazz"}}),
+        ("hip hop", {"track": {"genre": "Hip-Hop"}}),
+        ("2018", {"track": {"year": 2018}}),
+        ("5", {"limit": 5}),
+    ],
+)
+def test_extract_text_trivial_input_skips_model(get_extractor, text, expected):
+    assert extractor_module.extract_text(text, compact=True) == expected
+    get_extractor.assert_not_called()
+
+
+def test_trivial_check_leaves_fold_cache_to_model_spellings(get_extractor):
+    extractor_module._fold.cache_clear()
+
+    extractor_module.extract_text("Jazz", compact=True)
+    extractor_module.extract_text("5", compact=True)
+
+    assert extractor_module._fold.cache_info().currsize == 0
+
+
+def test_extract_text_non_decimal_digits_reach_model(model_stub):
+    model_stub.return_value = {"limit": 2}
+
+    # "²" is a digit but not a decimal, int() would raise on it
+    assert extractor_module.extract_text("²", compact=True) == {"limit": 2}
+    assert model_stub.call_count == 1
+
+
+def test_extract_many_trivial_only_skips_extractor(get_extractor):
+    results = extractor_module.extract_many(["Jazz", "5"])
+
+    get_extractor.assert_not_called()
+    assert [result.limit for result in results] == [None, 5]
+
+
+def test_extract_many_single_call(extractor, mock_jsonformer_output):
+    extractor.jsonformer.return_value = {"results": [mock_jsonformer_output, {"limit": 3}]}
+
+    results = extractor.extract_many(["first text", "second text"])
+
+    assert extractor.jsonformer.call_count == 1
+    assert results[0].track.genre == "Hip-Hop"
+    assert results[1].limit == 3
+
+
+def test_extract_many_falls_back_per_text(extractor):
+    extractor.jsonformer.side_effect = [{"results": [{"limit": 3}]}, {"limit": 1}, {"limit": 2}]
+
+    results = extractor.extract_many(["first text", "second text"])
+
+    assert extractor.jsonformer.call_count == 3
+    assert [result.limit for result in results] == [1, 2]
+
+
+def test_vllm_budget_scales_with_batch_size(mock_jsonformer_output):
+    generator = extractor_module.VLLMGenerator("model", "http://vllm", max_tokens=100)
+    generator.session = Mock()
+    generator.session.post.return_value.json.return_value = {
+        "choices": [{"text": json.dumps({"results": [mock_jsonformer_output] * 3})}]
+    }
+    extractor = TextExtractor(jsonformer=generator)
+
+    extractor.extract_many(["first text", "second text", "third text"])
+    generator.session.post.return_value.json.return_value = {
+        "choices": [{"text": json.dumps(mock_jsonformer_output)}]
+    }
+    extractor.extract("fourth text")
+
+    budgets = [call.kwargs["json"]["max_tokens"] for call in generator.session.post.call_args_list]
+    assert budgets == [300, 100]
 
 
 def test_jsonformer_exception_is_handled(extractor):
@@ -124,9 +401,7 @@ def test_jsonformer_exception_is_handled(extractor):
     assert isinstance(result, MusicMetadata)
 
 @pytest.mark.integration
-def test_with_real_jsonformer():
-    extractor = TextExtractor(compact=True)
-
-    result = extractor.extract("A happy hip hop song by Adele")
+def test_with_real_jsonformer(real_extractor):
+    result = real_extractor.extract("A happy hip hop song by Adele")
 
     assert result.track.genre == "Hip-Hop"